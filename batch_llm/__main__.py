@@ -1,4 +1,4 @@
-from batch_llm.compare import main
+from batch_llm.compare import run_main
 
 if __name__ == "__main__":
-    main()
+    run_main()
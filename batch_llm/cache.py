@@ -0,0 +1,42 @@
+"""
+On-disk response cache for batch extraction results
+
+Results are stored as one JSON file per request, keyed by a SHA-256 of
+the model, temperature and prompt. Repeat runs over the same transcripts
+can then skip the batch APIs entirely.
+"""
+
+import json
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "batch_llm"
+
+
+class LLMCache:
+    """JSON file cache of parsed extraction results"""
+    
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def key(model: str, prompt: str, temperature: float) -> str:
+        """Build the cache key for a single request"""
+        raw = f"{model}\0{temperature}\0{prompt}".encode()
+        return hashlib.sha256(raw).hexdigest()
+    
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached result for a key, or None on a miss"""
+        try:
+            return json.loads((self.cache_dir / f"{key}.json").read_text())
+        except (OSError, ValueError):
+            return None
+    
+    def set(self, key: str, value: dict) -> None:
+        """Store a result, replacing the file atomically"""
+        path = self.cache_dir / f"{key}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(value))
+        tmp_path.replace(path)
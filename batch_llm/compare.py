@@ -16,19 +16,240 @@ Example usage:
 import os
 import time
 import json
+import random
 import asyncio
+import logging
+import functools
 from dataclasses import dataclass
 from typing import Optional
 from pathlib import Path
 
+from batch_llm import pricing
+from batch_llm.cache import LLMCache
+
+logger = logging.getLogger("batch_llm")
+
+# Minimum seconds between "still processing" lines while polling
+PROGRESS_LOG_INTERVAL = 30.0
+
+# orjson parses result payloads several times faster; stdlib json is the fallback
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover - optional speedup
+    from json import loads as _json_loads
+
 # Test data for entity extraction
-TEST_CALLS = [
+TEST_CALLS = (
     ("call-1", "Agent: Hello! Customer: My name is John Doe, email john@example.com, phone 555-1234"),
     ("call-2", "Agent: Hi there! Customer: I'm Jane Smith, jane@test.com, 555-5678"),
     ("call-3", "Agent: Good morning! Customer: This is Bob Wilson, bob@company.com, 555-9012"),
     ("call-4", "Agent: Welcome! Customer: Alice Brown here, alice@email.com, 555-3456"),
     ("call-5", "Agent: How can I help? Customer: I'm Charlie Davis, charlie@mail.com, 555-7890"),
-]
+)
+
+# Column views of TEST_CALLS for result binding by index
+CALL_IDS = tuple(call_id for call_id, _ in TEST_CALLS)
+TRANSCRIPTS = tuple(transcript for _, transcript in TEST_CALLS)
+
+
+# Extraction prompt pieces; the shared header comes first so providers can
+# prompt-cache the common prefix across calls
+EXTRACT_HEADER = (
+    "Extract the following from this call transcript:\n"
+    "- Customer name\n"
+    "- Email address\n"
+    "- Phone number\n\n"
+)
+EXTRACT_FOOTER = "\n\nReturn as JSON with keys: customer_name, email, phone"
+
+
+@functools.lru_cache(maxsize=4096)
+def build_prompt(transcript: str) -> str:
+    """Build (once per transcript) the single-call extraction prompt"""
+    return f"{EXTRACT_HEADER}Transcript: {transcript}{EXTRACT_FOOTER}"
+
+
+# Query batching: several transcripts share one header and one request
+MEGAPROMPT_HEADER = (
+    "Extract the following from each call transcript below:\n"
+    "- Customer name\n"
+    "- Email address\n"
+    "- Phone number\n\n"
+)
+MEGAPROMPT_FOOTER = (
+    "\n\nReturn as JSON with a single key \"results\": a list with one object "
+    "per transcript, each with keys: id (the bracketed transcript id), "
+    "customer_name, email, phone"
+)
+
+
+def group_calls(calls, size: int) -> list:
+    """Split calls into consecutive groups of at most `size` calls"""
+    return [calls[i:i + size] for i in range(0, len(calls), size)]
+
+
+def create_megaprompt(calls) -> str:
+    """Create one extraction prompt covering several transcripts"""
+    transcripts = "\n".join(f"[{call_id}] {transcript}" for call_id, transcript in calls)
+    return f"{MEGAPROMPT_HEADER}Transcripts:\n{transcripts}{MEGAPROMPT_FOOTER}"
+
+
+def split_grouped_result(call_ids: list[str], data: dict) -> list[dict]:
+    """Map a megaprompt response back to one result per call
+    
+    Entries are bound by their id. Position is only used when no entry
+    carries a known id at all; otherwise entries with an unknown or
+    repeated id are dropped, never attached to some other call.
+    """
+    if not isinstance(data, dict):
+        logger.warning("    ⚠️  Grouped response is not a JSON object; dropping it")
+        return []
+    
+    entries = [entry for entry in data.get("results", []) if isinstance(entry, dict)]
+    ids = [entry.pop("id", None) for entry in entries]
+    
+    if not any(call_id in call_ids for call_id in ids):
+        # The model dropped every id; trust the order it was asked to keep
+        if len(entries) != len(call_ids):
+            logger.warning("    ⚠️  Got %d unlabelled results for %d calls", len(entries), len(call_ids))
+        return [
+            {"call_id": call_id, "data": entry}
+            for call_id, entry in zip(call_ids, entries)
+        ]
+    
+    claimed = {}
+    for call_id, entry in zip(ids, entries):
+        if call_id not in call_ids:
+            logger.warning("    ⚠️  Dropping result with unknown id %r", call_id)
+        elif call_id in claimed:
+            logger.warning("    ⚠️  Dropping duplicate result for %s", call_id)
+        else:
+            claimed[call_id] = entry
+    return [
+        {"call_id": call_id, "data": claimed[call_id]}
+        for call_id in call_ids
+        if call_id in claimed
+    ]
+
+
+def dedupe_calls(calls) -> tuple[list, dict[str, list[str]]]:
+    """Collapse calls with identical transcripts into a single submission
+    
+    Returns the unique calls plus a map from each submitted call_id to
+    every call_id that shares its transcript.
+    """
+    unique = {}
+    aliases = {}
+    for call_id, transcript in calls:
+        first_id, _ = unique.setdefault(transcript, (call_id, transcript))
+        aliases.setdefault(first_id, []).append(call_id)
+    return list(unique.values()), aliases
+
+
+def expand_duplicates(results: list[dict], aliases: dict[str, list[str]]) -> list[dict]:
+    """Fan results for deduplicated calls back out to every original call"""
+    expanded = []
+    for result in results:
+        for call_id in aliases.get(result["call_id"], [result["call_id"]]):
+            expanded.append({"call_id": call_id, "data": result["data"]})
+    return expanded
+
+
+def split_cached(calls, cache: Optional[LLMCache], key_for) -> tuple[list[dict], list]:
+    """Split calls into cached results and calls that still need the API"""
+    if cache is None:
+        return [], list(calls)
+    
+    cached, pending = [], []
+    for call_id, transcript in calls:
+        data = cache.get(key_for(transcript))
+        if data is None:
+            pending.append((call_id, transcript))
+        else:
+            cached.append({"call_id": call_id, "data": data})
+    return cached, pending
+
+
+def store_cached(cache: Optional[LLMCache], calls, results: list[dict], key_for) -> None:
+    """Write freshly retrieved results back to the cache"""
+    if cache is None:
+        return
+    
+    transcripts = dict(calls)
+    for result in results:
+        transcript = transcripts.get(result["call_id"])
+        if transcript is not None:
+            cache.set(key_for(transcript), result["data"])
+
+
+async def _iter_jsonl_bytes(response):
+    """Yield JSONL records from a streamed response as raw bytes
+    
+    Skips the text decode of iter_lines(); both orjson and json.loads
+    accept bytes directly.
+    """
+    pending = b""
+    async for chunk in response.iter_bytes():
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def configure_logging(stream=None) -> None:
+    """Send batch_llm progress output to `stream` (stderr by default) as it happens
+    
+    Only progress and diagnostics go through the logger; the race report is
+    printed to stdout, so LOG_LEVEL can quiet a run without hiding its result.
+    Unbuffered on purpose: the "still processing" lines only prove the run
+    is alive if they appear on time, and a write is cheap next to a poll sleep.
+    Callers that also print() progress should pass sys.stdout to keep lines in order.
+    """
+    if not logger.handlers:
+        stream_handler = logging.StreamHandler(stream)
+        stream_handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(stream_handler)
+    
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    if isinstance(logging.getLevelName(level), int):
+        logger.setLevel(level)
+    else:
+        logger.setLevel(logging.INFO)
+        logger.warning("⚠️  Unknown LOG_LEVEL %r, using INFO", level)
+
+
+# Shared across processors so status polls reuse pooled keep-alive connections.
+# The httpx pool belongs to the loop that opened it, so a new loop gets a new client.
+_OPENAI_CLIENT = None
+_OPENAI_CLIENT_LOOP = None
+
+
+def _get_openai_client():
+    """Return the AsyncOpenAI client for the running event loop"""
+    global _OPENAI_CLIENT, _OPENAI_CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if _OPENAI_CLIENT is None or _OPENAI_CLIENT_LOOP is not loop:
+        from openai import AsyncOpenAI
+        _OPENAI_CLIENT = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        _OPENAI_CLIENT_LOOP = loop
+    return _OPENAI_CLIENT
+
+
+_GEMINI_CLIENT = None
+
+
+def _get_gemini_client():
+    """Return the process-wide google-genai client, creating it on first use"""
+    global _GEMINI_CLIENT
+    if _GEMINI_CLIENT is None:
+        from google import genai
+        
+        api_key = os.getenv("GOOGLE_AI_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_AI_API_KEY not set")
+        _GEMINI_CLIENT = genai.Client(api_key=api_key)
+    return _GEMINI_CLIENT
 
 
 @dataclass
@@ -37,199 +258,244 @@ class BatchResult:
     elapsed_time: float
     success: bool
     results: list
-    cost_per_1k: float
+    cost_per_1m: float
 
 
 class OpenAIBatchProcessor:
     """OpenAI Batch API processor"""
     
-    BASE_COST_PER_1M = 0.075  # $0.075 per 1M tokens for gpt-4o-mini batch
-    BATCH_DISCOUNT = 0.5  # 50% discount for batch
+    BATCH_COST_PER_1M = pricing.OPENAI_BATCH_PRICE_PER_1M
+    TEMPERATURE = 0.1
     
-    def __init__(self):
-        from openai import OpenAI
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, calls_per_request: int = 1, cache: Optional[LLMCache] = None):
         self.model = "gpt-4o-mini"
+        self.calls_per_request = calls_per_request
+        self.cache = cache
+        self._groups: dict[str, list[str]] = {}
+    
+    @property
+    def client(self):
+        """AsyncOpenAI client bound to the running event loop"""
+        return _get_openai_client()
     
     def create_prompt(self, transcript: str) -> str:
         """Create extraction prompt for a transcript"""
-        return (
-            "Extract the following from this call transcript:\n"
-            "- Customer name\n"
-            "- Email address\n"
-            "- Phone number\n\n"
-            f"Transcript: {transcript}\n\n"
-            "Return as JSON with keys: customer_name, email, phone"
-        )
+        return build_prompt(transcript)
+    
+    def cache_key(self, transcript: str) -> str:
+        """Cache key for the single-call request of a transcript"""
+        return LLMCache.key(self.model, self.create_prompt(transcript), self.TEMPERATURE)
     
-    def create_batch_requests(self) -> list[dict]:
+    async def warmup(self) -> None:
+        """Open a pooled connection to the API before any timing starts"""
+        await self.client.models.list()
+    
+    def create_batch_requests(self, calls=TEST_CALLS) -> list[dict]:
         """Create batch request payload"""
         requests = []
-        for call_id, transcript in TEST_CALLS:
+        for idx, group in enumerate(group_calls(calls, self.calls_per_request)):
+            if len(group) == 1:
+                custom_id, prompt = group[0][0], self.create_prompt(group[0][1])
+            else:
+                custom_id, prompt = f"group-{idx}", create_megaprompt(group)
+            self._groups[custom_id] = [call_id for call_id, _ in group]
+            
             requests.append({
-                "custom_id": call_id,
+                "custom_id": custom_id,
                 "method": "POST",
                 "url": "/v1/chat/completions",
                 "body": {
                     "model": self.model,
                     "messages": [{
                         "role": "user",
-                        "content": self.create_prompt(transcript)
+                        "content": prompt
                     }],
-                    "temperature": 0.1,
-                    "max_tokens": 500,
+                    "temperature": self.TEMPERATURE,
+                    "max_tokens": 500 * len(group),
                     "response_format": {"type": "json_object"}
                 }
             })
         return requests
     
     async def upload_batch_file(self, requests: list[dict]) -> str:
-        """Upload batch requests file to OpenAI"""
-        import tempfile
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False) as f:
-            for req in requests:
-                f.write(json.dumps(req) + '\n')
-            temp_path = f.name
-        
-        try:
-            with open(temp_path, 'rb') as f:
-                batch_file = self.client.files.create(
-                    file=f,
-                    purpose="batch"
-                )
-            return batch_file.id
-        finally:
-            try:
-                os.unlink(temp_path)
-            except OSError:
-                pass
+        """Upload batch requests to OpenAI straight from memory"""
+        payload = "\n".join(json.dumps(req, separators=(",", ":")) for req in requests)
+        batch_file = await self.client.files.create(
+            file=("batch.jsonl", (payload + "\n").encode()),
+            purpose="batch"
+        )
+        return batch_file.id
     
-    def create_batch_job(self, file_id: str) -> dict:
+    async def create_batch_job(self, file_id: str) -> dict:
         """Create batch job from uploaded file"""
-        batch = self.client.batches.create(
+        batch = await self.client.batches.create(
             input_file_id=file_id,
             endpoint="/v1/chat/completions",
             completion_window="24h"
         )
         return batch
     
-    async def wait_for_completion(self, batch_id: str, poll_interval: int = 10) -> dict:
-        """Poll for batch completion"""
+    async def wait_for_completion(
+        self,
+        batch_id: str,
+        initial: float = 1.0,
+        max_interval: float = 30.0,
+        factor: float = 1.6,
+    ) -> dict:
+        """Poll for batch completion with exponential backoff and jitter"""
+        started = last_logged = time.monotonic()
+        delay = initial
         while True:
-            batch = self.client.batches.retrieve(batch_id)
+            batch = await self.client.batches.retrieve(batch_id)
             
             if batch.status == "completed":
                 return batch
             elif batch.status in ["failed", "expired", "cancelled"]:
                 raise RuntimeError(f"Batch failed with status: {batch.status}")
             
-            await asyncio.sleep(poll_interval)
+            now = time.monotonic()
+            if now - last_logged >= PROGRESS_LOG_INTERVAL:
+                logger.info("  ⏳ Still processing... %.0fs elapsed (status: %s)", now - started, batch.status)
+                last_logged = now
+            
+            await asyncio.sleep(delay + random.uniform(0, delay * 0.1))
+            delay = min(delay * factor, max_interval)
     
     async def get_results(self, output_file_id: str) -> list[dict]:
-        """Retrieve and parse batch results"""
-        result_file = self.client.files.content(output_file_id)
+        """Stream the result file and parse it line by line"""
         results = []
         
-        for line in result_file.text.split('\n'):
-            if line.strip():
-                parsed = json.loads(line)
-                custom_id = parsed['custom_id']
-                content = json.loads(
-                    parsed['response']['body']['choices'][0]['message']['content']
-                )
-                results.append({
-                    "call_id": custom_id,
-                    "data": content
-                })
+        async with self.client.files.with_streaming_response.content(output_file_id) as response:
+            async for line in _iter_jsonl_bytes(response):
+                if line.strip():
+                    parsed = _json_loads(line)
+                    custom_id = parsed['custom_id']
+                    content = _json_loads(
+                        parsed['response']['body']['choices'][0]['message']['content']
+                    )
+                    call_ids = self._groups.get(custom_id, [custom_id])
+                    if len(call_ids) > 1:
+                        results.extend(split_grouped_result(call_ids, content))
+                    else:
+                        results.append({
+                            "call_id": custom_id,
+                            "data": content
+                        })
+        
+        return results
+    
+    async def _run_batch(self, calls) -> list[dict]:
+        """Submit calls as one batch job and return the parsed results"""
+        unique_calls, aliases = dedupe_calls(calls)
+        
+        logger.info("  📤 Uploading batch requests...")
+        file_id = await self.upload_batch_file(self.create_batch_requests(unique_calls))
         
+        logger.info("  📋 Creating batch job...")
+        batch = await self.create_batch_job(file_id)
+        logger.info("  🆔 Batch ID: %s", batch.id)
+        
+        logger.info("  ⏳ Waiting for completion...")
+        completed_batch = await self.wait_for_completion(batch.id)
+        
+        logger.info("  📥 Retrieving results...")
+        results = expand_duplicates(
+            await self.get_results(completed_batch.output_file_id), aliases
+        )
+        # cache_key describes the single-call prompt, not a megaprompt's
+        if self.calls_per_request == 1:
+            store_cached(self.cache, calls, results, self.cache_key)
         return results
     
-    async def run(self) -> BatchResult:
+    async def run(self, calls=TEST_CALLS) -> BatchResult:
         """Execute full batch process and return results"""
-        start_time = time.time()
+        start_time = time.monotonic()
         results = []
         
         try:
-            print("  📤 Uploading batch requests...")
-            requests = self.create_batch_requests()
-            file_id = await self.upload_batch_file(requests)
-            
-            print("  📋 Creating batch job...")
-            batch = self.create_batch_job(file_id)
-            print(f"  🆔 Batch ID: {batch.id}")
+            results, pending = split_cached(calls, self.cache, self.cache_key)
+            if results:
+                logger.info("  💾 %d result(s) served from cache", len(results))
+            if pending:
+                results = results + await self._run_batch(pending)
             
-            print("  ⏳ Waiting for completion...")
-            completed_batch = await self.wait_for_completion(batch.id)
-            
-            print("  📥 Retrieving results...")
-            results = await self.get_results(completed_batch.output_file_id)
-            
-            elapsed = time.time() - start_time
-            print(f"  ✅ Completed in {elapsed:.2f}s")
+            elapsed = time.monotonic() - start_time
+            logger.info("  ✅ Completed in %.2fs", elapsed)
             
             return BatchResult(
                 elapsed_time=elapsed,
                 success=True,
                 results=results,
-                cost_per_1m=self.BASE_COST_PER_1M * self.BATCH_DISCOUNT
+                cost_per_1m=self.BATCH_COST_PER_1M
             )
             
         except Exception as e:
-            elapsed = time.time() - start_time
-            print(f"  ❌ Failed: {e}")
+            elapsed = time.monotonic() - start_time
+            logger.error("  ❌ Failed: %s", e)
             return BatchResult(
                 elapsed_time=elapsed,
                 success=False,
                 results=results,
-                cost_per_1m=self.BASE_COST_PER_1M * self.BATCH_DISCOUNT
+                cost_per_1m=self.BATCH_COST_PER_1M
             )
 
 
+async def run_openai_batch_async(calls=TEST_CALLS, calls_per_request: int = 1) -> BatchResult:
+    """Run a single OpenAI batch outside of a BatchComparison race"""
+    return await OpenAIBatchProcessor(calls_per_request).run(calls)
+
+
 class GeminiBatchProcessor:
     """Google Gemini Batch API processor"""
     
-    # Gemini 2.0 Flash batch pricing (50% off)
-    BASE_COST_PER_1M = 0.0375
+    BATCH_COST_PER_1M = pricing.GEMINI_BATCH_PRICE_PER_1M
+    TEMPERATURE = 0.1
     
-    def __init__(self):
-        import google.generativeai as genai
-        self.genai = genai
+    def __init__(self, calls_per_request: int = 1, cache: Optional[LLMCache] = None):
         self.model = "gemini-2.0-flash-exp"
+        self.calls_per_request = calls_per_request
+        self.cache = cache
+        self._groups: list[list[str]] = []
+    
+    async def warmup(self) -> None:
+        """Open a connection to the API before any timing starts"""
+        await asyncio.to_thread(_get_gemini_client().models.list)
     
     def create_prompt(self, transcript: str) -> str:
         """Create extraction prompt for a transcript"""
-        return (
-            "Extract the following from this call transcript:\n"
-            "- Customer name\n"
-            "- Email address\n"
-            "- Phone number\n\n"
-            f"Transcript: {transcript}\n\n"
-            "Return as JSON with keys: customer_name, email, phone"
-        )
+        return build_prompt(transcript)
     
-    def create_inline_requests(self) -> list[dict]:
+    def cache_key(self, transcript: str) -> str:
+        """Cache key for the single-call request of a transcript"""
+        return LLMCache.key(self.model, self.create_prompt(transcript), self.TEMPERATURE)
+    
+    def create_inline_requests(self, calls=TEST_CALLS) -> list[dict]:
         """Create inline batch requests for Gemini"""
         requests = []
-        for call_id, transcript in TEST_CALLS:
+        self._groups = []
+        for group in group_calls(calls, self.calls_per_request):
+            if len(group) == 1:
+                prompt = self.create_prompt(group[0][1])
+            else:
+                prompt = create_megaprompt(group)
+            self._groups.append([call_id for call_id, _ in group])
+            
             requests.append({
                 "model": self.model,
                 "contents": [{
-                    "parts": [{"text": self.create_prompt(transcript)}],
+                    "parts": [{"text": prompt}],
                     "role": "user"
                 }],
                 "config": {
-                    "temperature": 0.1,
+                    "temperature": self.TEMPERATURE,
                     "response_mime_type": "application/json"
                 }
             })
         return requests
     
-    async def run(self) -> BatchResult:
+    async def run(self, calls=TEST_CALLS) -> BatchResult:
         """Execute full batch process and return results"""
-        from google import genai
-        
-        start_time = time.time()
+        start_time = time.monotonic()
         results = []
         
         try:
@@ -237,55 +503,70 @@ class GeminiBatchProcessor:
             if not api_key:
                 raise ValueError("GOOGLE_AI_API_KEY not set")
             
-            self.genai.configure(api_key=api_key)
-            client = genai.Client(api_key=api_key)
+            results, pending = split_cached(calls, self.cache, self.cache_key)
+            if results:
+                logger.info("  💾 %d result(s) served from cache", len(results))
+            if pending:
+                results = results + await self._run_batch(_get_gemini_client(), pending)
             
-            # Create batch job
-            print("  📋 Creating batch job...")
-            inline_requests = self.create_inline_requests()
-            
-            batch_job = client.batches.create(
-                model=self.model,
-                src=inline_requests,
-                config={
-                    "display_name": f"entity-extraction-{int(time.time())}",
-                }
-            )
-            
-            batch_name = batch_job.name if hasattr(batch_job, 'name') else batch_job
-            print(f"  🆔 Batch name: {batch_name}")
-            
-            print("  ⏳ Waiting for completion...")
-            completed_job = await self._wait_for_completion(client, batch_name)
-            
-            print("  📥 Retrieving results...")
-            results = self._parse_results(completed_job)
-            
-            elapsed = time.time() - start_time
-            print(f"  ✅ Completed in {elapsed:.2f}s")
+            elapsed = time.monotonic() - start_time
+            logger.info("  ✅ Completed in %.2fs", elapsed)
             
             return BatchResult(
                 elapsed_time=elapsed,
                 success=True,
                 results=results,
-                cost_per_1m=self.BASE_COST_PER_1M
+                cost_per_1m=self.BATCH_COST_PER_1M
             )
             
         except Exception as e:
-            elapsed = time.time() - start_time
-            print(f"  ❌ Failed: {e}")
-            import traceback
-            traceback.print_exc()
+            elapsed = time.monotonic() - start_time
+            logger.exception("  ❌ Failed: %s", e)
             return BatchResult(
                 elapsed_time=elapsed,
                 success=False,
                 results=results,
-                cost_per_1m=self.BASE_COST_PER_1M
+                cost_per_1m=self.BATCH_COST_PER_1M
             )
     
-    async def _wait_for_completion(self, client, batch_name: str, poll_interval: int = 10) -> dict:
-        """Poll for batch completion"""
-        from google.api_core.exceptions import NotFound
+    async def _run_batch(self, client, calls) -> list[dict]:
+        """Submit calls as one batch job and return the parsed results"""
+        unique_calls, aliases = dedupe_calls(calls)
+        
+        logger.info("  📋 Creating batch job...")
+        # google-genai calls block, so keep them off the loop the OpenAI leg runs on
+        batch_job = await asyncio.to_thread(
+            client.batches.create,
+            model=self.model,
+            src=self.create_inline_requests(unique_calls),
+            config={
+                "display_name": f"entity-extraction-{int(time.time())}",
+            }
+        )
+        
+        batch_name = batch_job.name if hasattr(batch_job, 'name') else batch_job
+        logger.info("  🆔 Batch name: %s", batch_name)
+        
+        logger.info("  ⏳ Waiting for completion...")
+        completed_job = await self._wait_for_completion(client, batch_name)
+        
+        logger.info("  📥 Retrieving results...")
+        results = expand_duplicates(self._parse_results(completed_job), aliases)
+        # cache_key describes the single-call prompt, not a megaprompt's
+        if self.calls_per_request == 1:
+            store_cached(self.cache, calls, results, self.cache_key)
+        return results
+    
+    async def _wait_for_completion(
+        self,
+        client,
+        batch_name: str,
+        initial: float = 1.0,
+        max_interval: float = 30.0,
+        factor: float = 1.6,
+    ) -> dict:
+        """Poll for batch completion with exponential backoff and jitter"""
+        from google.genai import errors
         
         completed_states = {
             'JOB_STATE_SUCCEEDED',
@@ -294,40 +575,55 @@ class GeminiBatchProcessor:
             'JOB_STATE_EXPIRED',
         }
         
+        started = last_logged = time.monotonic()
+        delay = initial
         while True:
             try:
-                batch_job = client.batches.get(name=batch_name)
+                batch_job = await asyncio.to_thread(client.batches.get, name=batch_name)
                 state = batch_job.state if hasattr(batch_job, 'state') else str(batch_job)
                 
                 if state in completed_states:
                     return batch_job
                 
-                await asyncio.sleep(poll_interval)
+                now = time.monotonic()
+                if now - last_logged >= PROGRESS_LOG_INTERVAL:
+                    logger.info("  ⏳ Still processing... %.0fs elapsed (state: %s)", now - started, state)
+                    last_logged = now
                 
-            except NotFound:
-                raise RuntimeError(f"Batch job not found: {batch_name}")
+                await asyncio.sleep(delay + random.uniform(0, delay * 0.1))
+                delay = min(delay * factor, max_interval)
+                
+            except errors.ClientError as e:
+                if e.code == 404:
+                    raise RuntimeError(f"Batch job not found: {batch_name}") from e
+                raise
     
     def _parse_results(self, batch_job) -> list[dict]:
         """Parse results from completed batch job"""
         results = []
         
-        # Check for inline responses
-        if hasattr(batch_job, 'inline_responses') and batch_job.inline_responses:
-            for idx, response in enumerate(batch_job.inline_responses):
-                if hasattr(response, 'response') and response.response:
-                    try:
-                        text = ""
-                        for part in response.response.candidates[0].content.parts:
-                            if hasattr(part, 'text'):
-                                text += part.text
-                        
-                        data = json.loads(text.strip())
-                        results.append({
-                            "call_id": TEST_CALLS[idx][0],
-                            "data": data
-                        })
-                    except Exception as e:
-                        print(f"    ⚠️  Error parsing response {idx}: {e}")
+        # Inline jobs return their responses on the job's destination
+        dest = getattr(batch_job, "dest", None)
+        responses = getattr(dest, "inlined_responses", None) or []
+        for idx, response in enumerate(responses):
+            generated = response.response
+            if generated is None:
+                continue
+            try:
+                parts = generated.candidates[0].content.parts
+                text = "".join(part.text for part in parts if part.text)
+                
+                data = _json_loads(text.strip())
+                call_ids = self._groups[idx]
+                if len(call_ids) > 1:
+                    results.extend(split_grouped_result(call_ids, data))
+                else:
+                    results.append({
+                        "call_id": call_ids[0],
+                        "data": data
+                    })
+            except Exception as e:
+                logger.warning("    ⚠️  Error parsing response %d: %s", idx, e)
         
         return results
 
@@ -335,11 +631,22 @@ class GeminiBatchProcessor:
 class BatchComparison:
     """Main comparison runner"""
     
-    def __init__(self):
-        self.openai = OpenAIBatchProcessor()
-        self.gemini = GeminiBatchProcessor()
+    def __init__(self, calls_per_request: int = 1, cache: Optional[LLMCache] = None):
+        self.openai = OpenAIBatchProcessor(calls_per_request, cache)
+        self.gemini = GeminiBatchProcessor(calls_per_request, cache)
     
-    async def run_race(self) -> dict:
+    async def warmup(self) -> None:
+        """Warm both providers' connections so the race times only batch work"""
+        outcomes = await asyncio.gather(
+            self.openai.warmup(),
+            self.gemini.warmup(),
+            return_exceptions=True
+        )
+        for name, outcome in zip(("OpenAI", "Gemini"), outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("⚠️  %s warmup failed: %s", name, outcome)
+    
+    async def run_race(self, max_concurrency: int = 2) -> dict:
         """Run both batch APIs concurrently and compare results"""
         print("\n" + "=" * 70)
         print("🏁 BATCH API RACE: OpenAI vs Gemini")
@@ -348,27 +655,55 @@ class BatchComparison:
         print("⏱️  Both using async Batch APIs")
         print("=" * 70)
         
-        race_start = time.time()
+        await self.warmup()
+        race_start = time.monotonic()
         
-        # Run concurrently
-        openai_task = asyncio.create_task(self.openai.run())
-        gemini_task = asyncio.create_task(self.gemini.run())
+        # Run concurrently, reporting each provider as soon as it finishes
+        semaphore = asyncio.Semaphore(max_concurrency)
         
-        openai_result, gemini_result = await asyncio.gather(
-            openai_task,
-            gemini_task
-        )
+        async def run_provider(name: str, processor) -> tuple[str, BatchResult]:
+            async with semaphore:
+                return name, await processor.run()
+        
+        providers = {"OpenAI": self.openai, "Gemini": self.gemini}
+        tasks = [
+            asyncio.create_task(run_provider(name, processor))
+            for name, processor in providers.items()
+        ]
         
-        total_time = time.time() - race_start
+        results = {}
+        for next_done in asyncio.as_completed(tasks):
+            name, result = await next_done
+            status = "✅ finished" if result.success else "❌ failed"
+            print(f"\n🏁 {name} {status} after {result.elapsed_time:.1f}s")
+            results[name.lower()] = result
+        
+        total_time = time.monotonic() - race_start
         
         # Display results
-        self._print_results(openai_result, gemini_result, total_time)
+        self._print_results(results["openai"], results["gemini"], total_time)
         
-        return {
-            "openai": openai_result,
-            "gemini": gemini_result,
-            "total_time": total_time
-        }
+        results["total_time"] = total_time
+        return results
+    
+    def _print_winner(self, openai_result: BatchResult, gemini_result: BatchResult):
+        """Print the race winner; skipped unless both providers succeeded"""
+        if not (openai_result.success and gemini_result.success):
+            return
+        
+        if openai_result.elapsed_time < gemini_result.elapsed_time:
+            winner = "OpenAI"
+            diff = gemini_result.elapsed_time - openai_result.elapsed_time
+            speedup = gemini_result.elapsed_time / openai_result.elapsed_time
+        else:
+            winner = "Gemini"
+            diff = openai_result.elapsed_time - gemini_result.elapsed_time
+            speedup = openai_result.elapsed_time / gemini_result.elapsed_time
+        
+        print(f"\n🏆 Winner: {winner}")
+        print(f"⏱️  Time difference: {diff:.1f}s")
+        if speedup > 1:
+            print(f"⚡ {winner} is {speedup:.1f}x faster")
     
     def _print_results(self, openai_result: BatchResult, gemini_result: BatchResult, total_time: float):
         """Print comparison results"""
@@ -391,21 +726,7 @@ class BatchComparison:
         else:
             print(f"  {'Gemini':<10} {'❌ Failed':<12} {gemini_result.elapsed_time:>7.1f}s")
         
-        # Winner determination
-        if openai_result.success and gemini_result.success:
-            if openai_result.elapsed_time < gemini_result.elapsed_time:
-                winner = "OpenAI"
-                diff = gemini_result.elapsed_time - openai_result.elapsed_time
-                speedup = gemini_result.elapsed_time / openai_result.elapsed_time
-            else:
-                winner = "Gemini"
-                diff = openai_result.elapsed_time - gemini_result.elapsed_time
-                speedup = openai_result.elapsed_time / gemini_result.elapsed_time
-            
-            print(f"\n🏆 Winner: {winner}")
-            print(f"⏱️  Time difference: {diff:.1f}s")
-            if speedup > 1:
-                print(f"⚡ {winner} is {speedup:.1f}x faster")
+        self._print_winner(openai_result, gemini_result)
         
         # Cost comparison
         print("\n" + "=" * 70)
@@ -443,6 +764,8 @@ class BatchComparison:
 
 async def main():
     """Main entry point"""
+    configure_logging()
+    
     # Check API keys
     if not os.getenv("OPENAI_API_KEY"):
         print("❌ Error: OPENAI_API_KEY not set")
@@ -455,14 +778,32 @@ async def main():
         return
     
     # Show pricing info
-    print("\n📚 Batch API Pricing (50% off):")
-    print("   OpenAI gpt-4o-mini: $0.075/M tokens")
-    print("   Gemini 2.0 Flash:  $0.0375/M tokens")
+    print(f"\n📚 Batch API Pricing ({pricing.BATCH_DISCOUNT:.0%} off):")
+    print(f"   OpenAI gpt-4o-mini: ${pricing.OPENAI_BATCH_PRICE_PER_1M}/M tokens")
+    print(f"   Gemini 2.0 Flash:  ${pricing.GEMINI_BATCH_PRICE_PER_1M}/M tokens")
+    
+    # Opt-in response cache; a warm cache skips the APIs and skews the race
+    cache = LLMCache() if os.getenv("BATCH_LLM_CACHE") else None
+    
+    calls_per_request = int(os.getenv("BATCH_LLM_CALLS_PER_REQUEST", "1"))
+    if calls_per_request < 1:
+        print("❌ Error: BATCH_LLM_CALLS_PER_REQUEST must be at least 1")
+        return
     
     # Run comparison
-    comparison = BatchComparison()
+    comparison = BatchComparison(calls_per_request=calls_per_request, cache=cache)
     await comparison.run_race()
 
 
+def run_main() -> None:
+    """Run main() on uvloop when it is installed, else on the default loop"""
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_main()
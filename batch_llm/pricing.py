@@ -0,0 +1,14 @@
+"""
+Batch API pricing used for the cost comparison
+
+All prices are USD per 1M tokens. Both providers halve the regular
+price for batch jobs.
+"""
+
+BATCH_DISCOUNT = 0.5
+
+OPENAI_PRICE_PER_1M = 0.15  # gpt-4o-mini
+GEMINI_PRICE_PER_1M = 0.075  # gemini flash
+
+OPENAI_BATCH_PRICE_PER_1M = OPENAI_PRICE_PER_1M * BATCH_DISCOUNT
+GEMINI_BATCH_PRICE_PER_1M = GEMINI_PRICE_PER_1M * BATCH_DISCOUNT
@@ -1,215 +1,263 @@
 #!/usr/bin/env python3
 """
 Batch LLM API Comparison: OpenAI vs Gemini
-A simpler synchronous version that's easier to run and debug.
+A simpler version that's easier to run and debug: the OpenAI leg runs
+on asyncio and the blocking Gemini REST leg in a worker thread.
 
 Requirements:
     - OPENAI_API_KEY environment variable
     - GOOGLE_AI_API_KEY environment variable
 
 Usage:
-    python examples/simple_compare.py
+    python examples/simple_compare.py [--wait-both] [--calls-per-request N]
 """
 
 import os
+import sys
 import time
 import json
-import tempfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-# Test data - 5 calls
-TEST_CALLS = [
-    ("call-1", "Agent: Hello! Customer: My name is John Doe, email john@example.com, phone 555-1234"),
-    ("call-2", "Agent: Hi there! Customer: I'm Jane Smith, jane@test.com, 555-5678"),
-    ("call-3", "Agent: Good morning! Customer: This is Bob Wilson, bob@company.com, 555-9012"),
-    ("call-4", "Agent: Welcome! Customer: Alice Brown here, alice@email.com, 555-3456"),
-    ("call-5", "Agent: How can I help? Customer: I'm Charlie Davis, charlie@mail.com, 555-7890"),
-]
-
-
-def create_openai_prompt(transcript: str) -> str:
-    """Create extraction prompt for OpenAI"""
-    return (
-        "Extract the following from this call transcript:\n"
-        "- Customer name\n"
-        "- Email address\n"
-        "- Phone number\n\n"
-        f"Transcript: {transcript}\n\n"
-        "Return as JSON with keys: customer_name, email, phone"
-    )
+import hashlib
+import random
+import asyncio
+import argparse
+import threading
+
+from batch_llm import pricing
+from batch_llm.compare import (
+    CALL_IDS,
+    TEST_CALLS,
+    TRANSCRIPTS,
+    build_prompt,
+    configure_logging,
+    create_megaprompt,
+    run_openai_batch_async,
+    split_grouped_result,
+)
+
+
+# orjson serializes the job body and parses polls several times faster
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:  # pragma: no cover - optional speedup
+    from json import loads as _json_loads
+    
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+# Seconds between "still processing" lines while polling
+PROGRESS_INTERVAL = 30.0
+
+
+def _poll_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with jitter for the given zero-based poll attempt"""
+    return min(cap, base * (2 ** min(attempt, 5)) * (1 + random.random()))
+
+
+# Shared keep-alive session so the job POST and every poll reuse one TLS connection
+_REST_SESSION = None
+
+
+def _rest_session(api_key: str):
+    """Return the pooled requests session for Gemini REST calls"""
+    global _REST_SESSION
+    if _REST_SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        _REST_SESSION = requests.Session()
+        _REST_SESSION.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                # Hand the last error response back so the poll loop just polls again
+                raise_on_status=False
+            )
+        ))
+    _REST_SESSION.headers.update({
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    })
+    return _REST_SESSION
+
+
+# sha256(api key) prefix -> resolved model name; a rotated key misses the cache
+_GEMINI_MODELS: dict[str, str] = {}
+
+
+def _resolve_gemini_model(api_key: str) -> str:
+    """Pick a flash model with batch support, listing models once per API key"""
+    key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    if key_hash not in _GEMINI_MODELS:
+        import google.generativeai as genai
+        
+        genai.configure(api_key=api_key)
+        model_name = "gemini-1.5-flash"  # Fallback to stable model
+        try:
+            for m in genai.list_models():
+                if "flash" in m.name.lower() and "batch" in m.supported_generation_methods:
+                    model_name = m.name
+                    break
+        except Exception as e:
+            # Not memoized, so the next run tries the listing again
+            print(f"⚠️  Could not list models: {e}")
+            return model_name
+        _GEMINI_MODELS[key_hash] = model_name
+    return _GEMINI_MODELS[key_hash]
+
+
+# Set once the race has a winner; the Gemini pollers sleep on it between polls,
+# so setting it both wakes them and makes them stop
+_RACE_DECIDED = threading.Event()
+
+
+def cancel_gemini_polls() -> None:
+    """Stop the Gemini pollers, waking any that are sleeping out a backoff"""
+    _RACE_DECIDED.set()
+
+
+def _safe_loads(text):
+    """Parse one result payload into (data, error) so a bad row can't sink the batch"""
+    if text is None:
+        return None, "no prediction text"
+    try:
+        return _json_loads(text), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _prediction_text(result: dict):
+    """Text of one REST batch result, or None when the prediction is missing"""
+    try:
+        return result['prediction']['contents'][0]['parts'][0]['text']
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _response_text(response):
+    """Text of one client-library inline response, or None when it has none"""
+    try:
+        parts = response.response.candidates[0].content.parts or []
+        text = "".join(part.text for part in parts if part.text)
+    except (AttributeError, IndexError, TypeError):
+        return None
+    return text or None
+
+
+def _bind_results(texts: list, groups: list[list[str]]) -> list[dict]:
+    """Parse result payloads in order and pair them with their call ids
+    
+    `groups` holds the call ids behind each submitted request. Unparseable
+    rows are reported and skipped; rows beyond the submitted requests are
+    reported and ignored rather than bound to a guessed id.
+    """
+    if len(texts) > len(groups):
+        print(f"     ⚠️  Ignoring {len(texts) - len(groups)} unexpected extra result(s)")
+    
+    results = []
+    for idx, (call_ids, text) in enumerate(zip(groups, texts)):
+        data, error = _safe_loads(text)
+        if error is not None:
+            print(f"     ⚠️  Error parsing result {idx}: {error}")
+        elif len(call_ids) > 1:
+            results.extend(split_grouped_result(call_ids, data))
+        else:
+            results.append({"call_id": call_ids[0], "data": data})
+    return results
+
+
+# Shared by every inline request; json serialization copies it, so sharing is safe
+_GEN_CONFIG = {"temperature": 0.1, "responseMimeType": "application/json"}
 
 
 def create_gemini_prompt(transcript: str) -> str:
     """Create extraction prompt for Gemini"""
-    return create_openai_prompt(transcript)  # Same prompt for both
+    return build_prompt(transcript)  # Same prompt as the OpenAI processor
+
+
+def _request_groups(calls_per_request: int) -> list[tuple[list[str], str]]:
+    """Call ids and prompt of each request; a group shares one megaprompt"""
+    groups = []
+    for start in range(0, len(CALL_IDS), calls_per_request):
+        call_ids = list(CALL_IDS[start:start + calls_per_request])
+        transcripts = TRANSCRIPTS[start:start + calls_per_request]
+        if len(call_ids) == 1:
+            prompt = create_gemini_prompt(transcripts[0])
+        else:
+            prompt = create_megaprompt(zip(call_ids, transcripts))
+        groups.append((call_ids, prompt))
+    return groups
 
 
 # ============================================================================
 # OpenAI Batch API
 # ============================================================================
 
-def run_openai_batch():
-    """Run OpenAI Batch API test"""
-    from openai import OpenAI
-    
+async def run_openai_batch(calls_per_request: int = 1):
+    """Run OpenAI Batch API test through the shared async processor"""
     print("\n🔵 OpenAI Batch API: Starting...")
-    start_time = time.time()
+    result = await run_openai_batch_async(TEST_CALLS, calls_per_request)
     
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    if not result.success:
+        print("🔵 OpenAI: ❌ FAILED")
+        return result.elapsed_time, "failed", []
     
-    # Step 1: Create batch requests
-    batch_requests = []
-    for call_id, transcript in TEST_CALLS:
-        batch_requests.append({
-            "custom_id": call_id,
-            "method": "POST",
-            "url": "/v1/chat/completions",
-            "body": {
-                "model": "gpt-4o-mini",
-                "messages": [{
-                    "role": "user",
-                    "content": create_openai_prompt(transcript)
-                }],
-                "temperature": 0.1,
-                "max_tokens": 500,
-                "response_format": {"type": "json_object"}
-            }
-        })
-    
-    # Step 2: Upload file
-    print("🔵 OpenAI: Uploading batch file...")
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False) as f:
-        for req in batch_requests:
-            f.write(json.dumps(req) + '\n')
-        batch_file_path = f.name
+    print(f"🔵 OpenAI: ✅ COMPLETED in {result.elapsed_time:.2f}s")
+    print(f"🔵 OpenAI: Retrieved {len(result.results)} results")
     
-    try:
-        with open(batch_file_path, 'rb') as f:
-            batch_input_file = client.files.create(file=f, purpose="batch")
-        
-        # Step 3: Create batch job
-        print("🔵 OpenAI: Creating batch job...")
-        batch = client.batches.create(
-            input_file_id=batch_input_file.id,
-            endpoint="/v1/chat/completions",
-            completion_window="24h"
-        )
-        
-        batch_id = batch.id
-        print(f"🔵 OpenAI: Batch ID: {batch_id}")
-        print(f"🔵 OpenAI: Status: {batch.status}")
-        
-        # Step 4: Poll for completion
-        poll_count = 0
-        while True:
-            batch = client.batches.retrieve(batch_id)
-            poll_count += 1
-            elapsed = time.time() - start_time
-            
-            if batch.status == "completed":
-                print(f"🔵 OpenAI: ✅ COMPLETED in {elapsed:.2f}s")
-                
-                # Step 5: Get results
-                result_file = client.files.content(batch.output_file_id)
-                results = []
-                
-                for line in result_file.text.split('\n'):
-                    if line.strip():
-                        parsed = json.loads(line)
-                        custom_id = parsed['custom_id']
-                        content = json.loads(
-                            parsed['response']['body']['choices'][0]['message']['content']
-                        )
-                        results.append({"call_id": custom_id, "data": content})
-                
-                print(f"🔵 OpenAI: Retrieved {len(results)} results")
-                
-                # Show sample results
-                for result in results[:2]:
-                    print(f"     {result['call_id']}: {result['data']}")
-                
-                return elapsed, "success", results
-                
-            elif batch.status in ["failed", "expired", "cancelled"]:
-                print(f"🔵 OpenAI: ❌ FAILED with status: {batch.status}")
-                return elapsed, "failed", []
-            
-            # Log progress
-            if poll_count % 3 == 0:
-                print(f"🔵 OpenAI: Still processing... {elapsed:.0f}s elapsed (status: {batch.status})")
-            
-            time.sleep(10)
+    # Show sample results
+    for item in result.results[:2]:
+        print(f"     {item['call_id']}: {item['data']}")
     
-    finally:
-        # Cleanup temp file
-        try:
-            os.unlink(batch_file_path)
-        except OSError:
-            pass
+    return result.elapsed_time, "success", result.results
 
 
 # ============================================================================
 # Gemini Batch API
 # ============================================================================
 
-def run_gemini_batch():
+def run_gemini_batch(calls_per_request: int = 1):
     """Run Gemini Batch API test using REST API directly"""
-    import requests
-    import google.generativeai as genai
-    
     print("\n🟢 Gemini Batch API: Starting...")
-    start_time = time.time()
+    start_time = time.monotonic()
     
     api_key = os.getenv("GOOGLE_AI_API_KEY")
     if not api_key:
         print("❌ GOOGLE_AI_API_KEY not set")
         return -1, "failed", []
     
-    genai.configure(api_key=api_key)
-    
-    # Get available models
-    try:
-        models = genai.list_models()
-        model_name = "gemini-1.5-flash"  # Fallback to stable model
-        for m in models:
-            if "flash" in m.name.lower() and "batch" in m.supported_generation_methods:
-                model_name = m.name
-                break
-        print(f"🟢 Gemini: Using model: {model_name}")
-    except Exception as e:
-        print(f"⚠️  Could not list models: {e}")
-        model_name = "gemini-1.5-flash"
+    model_name = _resolve_gemini_model(api_key)
+    print(f"🟢 Gemini: Using model: {model_name}")
     
     # Prepare batch requests using REST API
     # Gemini batch API uses a different format
     base_url = "https://batchpredictiondata.googleapis.com/v1"
     
     # Create inline requests
-    inline_requests = []
-    for call_id, transcript in TEST_CALLS:
-        inline_requests.append({
-            "id": call_id,
+    request_groups = _request_groups(calls_per_request)
+    inline_requests = [
+        {
+            "id": call_ids[0] if len(call_ids) == 1 else f"group-{idx}",
             "request": {
                 "contents": [{
-                    "parts": [{"text": create_gemini_prompt(transcript)}],
+                    "parts": [{"text": prompt}],
                     "role": "user"
                 }],
-                "generationConfig": {
-                    "temperature": 0.1,
-                    "responseMimeType": "application/json"
-                }
+                "generationConfig": _GEN_CONFIG
             }
-        })
+        }
+        for idx, (call_ids, prompt) in enumerate(request_groups)
+    ]
     
     try:
         # Create batch prediction job
         print("🟢 Gemini: Creating batch job...")
         
         url = f"{base_url}/projects/*/locations/*/batchPredictionJobs"
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        session = _rest_session(api_key)
         
         job_config = {
             "displayName": f"entity-extraction-{int(time.time())}",
@@ -225,50 +273,59 @@ def run_gemini_batch():
             "instances": inline_requests
         }
         
-        # Try using the official batch API
-        response = requests.post(
+        # A job submitted after the race is decided would be billed for nothing
+        if _RACE_DECIDED.is_set():
+            print("🟢 Gemini: ⏹️  Cancelled, OpenAI finished first")
+            return time.monotonic() - start_time, "cancelled", []
+        
+        # Try using the official batch API; the session already sends the JSON content type
+        response = session.post(
             url,
-            headers=headers,
-            json=job_config,
+            data=_json_dumps(job_config),
             timeout=30
         )
         
         if response.status_code == 200:
-            job_data = response.json()
+            job_data = _json_loads(response.content)
             job_name = job_data.get('name')
             print(f"🟢 Gemini: Batch job created: {job_name}")
             
             # Poll for completion
             poll_count = 0
+            last_progress = 0.0
             while True:
-                job_response = requests.get(
+                if _RACE_DECIDED.is_set():
+                    print("🟢 Gemini: ⏹️  Cancelled, OpenAI finished first")
+                    return time.monotonic() - start_time, "cancelled", []
+                
+                # Field mask keeps each poll to a few bytes; results come in one final GET
+                job_response = session.get(
                     f"{base_url}/{job_name}",
-                    headers=headers,
+                    params={"fields": "name,state,error"},
                     timeout=30
                 )
+                elapsed = time.monotonic() - start_time
                 
                 if job_response.status_code == 200:
-                    job = job_response.json()
+                    job = _json_loads(job_response.content)
                     state = job.get('state', 'STATE_UNSPECIFIED')
-                    elapsed = time.time() - start_time
                     
                     if state == 'JOB_STATE_SUCCEEDED':
                         print(f"🟢 Gemini: ✅ COMPLETED in {elapsed:.2f}s")
                         
-                        # Parse results
-                        results = []
-                        if 'results' in job:
-                            for idx, result in enumerate(job['results']):
-                                try:
-                                    content = json.loads(
-                                        result['prediction']['contents'][0]['parts'][0]['text']
-                                    )
-                                    results.append({
-                                        "call_id": TEST_CALLS[idx][0],
-                                        "data": content
-                                    })
-                                except Exception as e:
-                                    print(f"     ⚠️  Error parsing result {idx}: {e}")
+                        # The job already succeeded, so a failed fetch or parse must not
+                        # resubmit it; the session has already retried transient errors
+                        try:
+                            full_response = session.get(f"{base_url}/{job_name}", timeout=30)
+                            full_response.raise_for_status()
+                            job = _json_loads(full_response.content)
+                            results = _bind_results(
+                                [_prediction_text(result) for result in job.get('results', [])],
+                                [call_ids for call_ids, _ in request_groups]
+                            )
+                        except Exception as e:
+                            print(f"🟢 Gemini: ❌ Could not read results of {job_name}: {e}")
+                            return elapsed, "failed", []
                         
                         print(f"🟢 Gemini: Retrieved {len(results)} results")
                         
@@ -283,24 +340,23 @@ def run_gemini_batch():
                         print(f"🟢 Gemini: ❌ FAILED: {error}")
                         return elapsed, "failed", []
                 
-                poll_count += 1
-                elapsed = time.time() - start_time
-                
-                if poll_count % 3 == 0:
+                if elapsed - last_progress >= PROGRESS_INTERVAL:
                     print(f"🟢 Gemini: Still processing... {elapsed:.0f}s elapsed")
+                    last_progress = elapsed
                 
-                time.sleep(10)
+                _RACE_DECIDED.wait(_poll_delay(poll_count))
+                poll_count += 1
         else:
             # If REST API fails, try official client library
             print(f"⚠️  REST API returned {response.status_code}, trying client library...")
-            return run_gemini_batch_client(api_key, start_time)
+            return run_gemini_batch_client(api_key, start_time, calls_per_request)
             
     except Exception as e:
         print(f"🟢 Gemini: Error with REST API: {e}")
-        return run_gemini_batch_client(api_key, start_time)
+        return run_gemini_batch_client(api_key, start_time, calls_per_request)
 
 
-def run_gemini_batch_client(api_key: str, start_time: float):
+def run_gemini_batch_client(api_key: str, start_time: float, calls_per_request: int = 1):
     """Fallback using official Google client library"""
     from google import genai
     import google.generativeai as genai_lib
@@ -312,18 +368,22 @@ def run_gemini_batch_client(api_key: str, start_time: float):
     
     # Try to use the batch API
     try:
-        inline_requests = []
-        for call_id, transcript in TEST_CALLS:
-            inline_requests.append({
+        request_groups = _request_groups(calls_per_request)
+        inline_requests = [
+            {
                 "contents": [{
-                    "parts": [{"text": create_gemini_prompt(transcript)}],
+                    "parts": [{"text": prompt}],
                     "role": "user"
                 }],
-                "generationConfig": {
-                    "temperature": 0.1,
-                    "responseMimeType": "application/json"
-                }
-            })
+                "generationConfig": _GEN_CONFIG
+            }
+            for _, prompt in request_groups
+        ]
+        
+        # The REST attempt may have failed after the race was decided; don't submit again
+        if _RACE_DECIDED.is_set():
+            print("🟢 Gemini: ⏹️  Cancelled, OpenAI finished first")
+            return time.monotonic() - start_time, "cancelled", []
         
         print("🟢 Gemini: Creating batch job...")
         batch_job = client.batches.create(
@@ -337,50 +397,54 @@ def run_gemini_batch_client(api_key: str, start_time: float):
         
         # Poll for completion
         poll_count = 0
-        completed_states = {'JOB_STATE_SUCCEEDED', 'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED'}
+        last_progress = 0.0
         
         while True:
+            if _RACE_DECIDED.is_set():
+                print("🟢 Gemini: ⏹️  Cancelled, OpenAI finished first")
+                return time.monotonic() - start_time, "cancelled", []
+            
+            # Only the status call is retried; a failure while handling a final
+            # state ends the run instead of polling a finished job forever
             try:
                 batch_job = client.batches.get(name=batch_name)
-                state = batch_job.state if hasattr(batch_job, 'state') else 'UNKNOWN'
-                elapsed = time.time() - start_time
-                
-                if state in completed_states:
-                    if state == 'JOB_STATE_SUCCEEDED':
-                        print(f"🟢 Gemini: ✅ COMPLETED in {elapsed:.2f}s")
-                        
-                        results = []
-                        if hasattr(batch_job, 'inline_responses') and batch_job.inline_responses:
-                            for idx, response in enumerate(batch_job.inline_responses):
-                                if hasattr(response, 'response') and response.response:
-                                    try:
-                                        text = ""
-                                        for part in response.response.candidates[0].content.parts:
-                                            if hasattr(part, 'text'):
-                                                text += part.text
-                                        data = json.loads(text.strip())
-                                        results.append({"call_id": TEST_CALLS[idx][0], "data": data})
-                                    except Exception as e:
-                                        print(f"     ⚠️  Error parsing: {e}")
-                        
-                        print(f"🟢 Gemini: Retrieved {len(results)} results")
-                        return elapsed, "success", results
-                    else:
-                        print(f"🟢 Gemini: ❌ FAILED with state: {state}")
-                        return elapsed, "failed", []
-                
-                poll_count += 1
-                if poll_count % 3 == 0:
-                    print(f"🟢 Gemini: Still processing... {elapsed:.0f}s elapsed")
-                
-                time.sleep(10)
-                
             except Exception as e:
+                # Back off like a normal poll; a decided race still wakes it early
                 print(f"🟢 Gemini: Polling error: {e}")
-                time.sleep(10)
+                _RACE_DECIDED.wait(_poll_delay(poll_count))
+                poll_count += 1
+                continue
+            
+            state = batch_job.state if hasattr(batch_job, 'state') else 'UNKNOWN'
+            elapsed = time.monotonic() - start_time
+            
+            match state:
+                case 'JOB_STATE_SUCCEEDED':
+                    print(f"🟢 Gemini: ✅ COMPLETED in {elapsed:.2f}s")
+                    
+                    # Inline jobs return their responses on the job's destination
+                    dest = getattr(batch_job, "dest", None)
+                    responses = getattr(dest, "inlined_responses", None) or []
+                    results = _bind_results(
+                        [_response_text(response) for response in responses],
+                        [call_ids for call_ids, _ in request_groups]
+                    )
+                    
+                    print(f"🟢 Gemini: Retrieved {len(results)} results")
+                    return elapsed, "success", results
+                case 'JOB_STATE_FAILED' | 'JOB_STATE_CANCELLED' | 'JOB_STATE_EXPIRED':
+                    print(f"🟢 Gemini: ❌ FAILED with state: {state}")
+                    return elapsed, "failed", []
+            
+            if elapsed - last_progress >= PROGRESS_INTERVAL:
+                print(f"🟢 Gemini: Still processing... {elapsed:.0f}s elapsed")
+                last_progress = elapsed
+            
+            _RACE_DECIDED.wait(_poll_delay(poll_count))
+            poll_count += 1
                 
     except Exception as e:
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - start_time
         print(f"🟢 Gemini: ❌ FAILED: {e}")
         return elapsed, "failed", []
 
@@ -389,24 +453,48 @@ def run_gemini_batch_client(api_key: str, start_time: float):
 # Race Test
 # ============================================================================
 
-def run_race():
-    """Run both batch APIs in parallel"""
+def run_race(wait_both: bool = False, calls_per_request: int = 1):
+    """Run both batch APIs in parallel, cancelling the loser unless `wait_both`"""
     print("\n" + "=" * 70)
     print("🏁 BATCH API RACE: OpenAI vs Gemini")
     print("=" * 70)
     print(f"📊 Processing {len(TEST_CALLS)} calls")
-    print("⏱️  Both using async Batch APIs with 50% discount")
-    print("💰 Gemini: $0.0375/M tokens | OpenAI: $0.075/M tokens")
+    print(f"⏱️  Both using async Batch APIs with {pricing.BATCH_DISCOUNT:.0%} discount")
+    print(
+        f"💰 Gemini: ${pricing.GEMINI_BATCH_PRICE_PER_1M:g}/M tokens | "
+        f"OpenAI: ${pricing.OPENAI_BATCH_PRICE_PER_1M:g}/M tokens"
+    )
     print("=" * 70)
     
-    race_start = time.time()
+    race_start = time.monotonic()
+    _RACE_DECIDED.clear()
     
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future_openai = executor.submit(run_openai_batch)
-        future_gemini = executor.submit(run_gemini_batch)
+    async def race():
+        # The OpenAI leg is native asyncio; only the blocking Gemini leg needs a thread
+        openai_task = asyncio.create_task(run_openai_batch(calls_per_request))
+        gemini_task = asyncio.create_task(asyncio.to_thread(run_gemini_batch, calls_per_request))
+        if wait_both:
+            return await asyncio.gather(openai_task, gemini_task)
+        
+        done, _ = await asyncio.wait(
+            {openai_task, gemini_task},
+            return_when=asyncio.FIRST_COMPLETED
+        )
+        # A failed first finisher decides nothing, so the other leg keeps running
+        if any(task.result()[1] == "success" for task in done):
+            openai_task.cancel()
+            cancel_gemini_polls()
         
-        openai_time, openai_status, openai_results = future_openai.result()
-        gemini_time, gemini_status, gemini_results = future_gemini.result()
+        try:
+            openai_outcome = await openai_task
+        except asyncio.CancelledError:
+            print("🔵 OpenAI: ⏹️  Cancelled, Gemini finished first")
+            openai_outcome = (time.monotonic() - race_start, "cancelled", [])
+        return openai_outcome, await gemini_task
+    
+    openai_outcome, gemini_outcome = asyncio.run(race())
+    openai_time, openai_status, openai_results = openai_outcome
+    gemini_time, gemini_status, gemini_results = gemini_outcome
     
     # Results
     print("\n" + "=" * 70)
@@ -417,12 +505,12 @@ def run_race():
     if openai_status == "success":
         print(f"  🔵 OpenAI:  {openai_time:>6.1f}s")
     else:
-        print(f"  🔵 OpenAI:  FAILED")
+        print(f"  🔵 OpenAI:  {openai_status.upper()}")
     
     if gemini_status == "success":
         print(f"  🟢 Gemini:  {gemini_time:>6.1f}s")
     else:
-        print(f"  🟢 Gemini:  FAILED")
+        print(f"  🟢 Gemini:  {gemini_status.upper()}")
     
     # Determine winner
     if openai_status == "success" and gemini_status == "success":
@@ -441,18 +529,43 @@ def run_race():
         print(f"\n🏆 Winner: {winner}")
         print(f"⏱️  Time difference: {diff:.1f}s")
         print(f"⚡ {winner} is {speedup:.1f}x faster")
+    elif "cancelled" in (openai_status, gemini_status):
+        winner = "OpenAI" if openai_status == "success" else "Gemini"
+        print(f"\n🏆 Winner: {winner} (run with --wait-both for the full time gap)")
     
     print("\n💰 Cost Comparison (per 1M tokens):")
-    print("   Gemini Batch: $0.0375 (50% off)")
-    print("   OpenAI Batch: $0.075 (50% off)")
-    print("   → Gemini is 2x cheaper for batch!")
+    print(f"   Gemini Batch: ${pricing.GEMINI_BATCH_PRICE_PER_1M:g} ({pricing.BATCH_DISCOUNT:.0%} off)")
+    print(f"   OpenAI Batch: ${pricing.OPENAI_BATCH_PRICE_PER_1M:g} ({pricing.BATCH_DISCOUNT:.0%} off)")
+    if pricing.OPENAI_BATCH_PRICE_PER_1M > pricing.GEMINI_BATCH_PRICE_PER_1M:
+        ratio = pricing.OPENAI_BATCH_PRICE_PER_1M / pricing.GEMINI_BATCH_PRICE_PER_1M
+        print(f"   → Gemini is {ratio:g}x cheaper for batch!")
+    else:
+        ratio = pricing.GEMINI_BATCH_PRICE_PER_1M / pricing.OPENAI_BATCH_PRICE_PER_1M
+        print(f"   → OpenAI is {ratio:g}x cheaper for batch!")
     
-    total_time = time.time() - race_start
+    total_time = time.monotonic() - race_start
     print(f"\n⏱️  Total race time: {total_time:.1f}s")
     print("=" * 70)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Race the OpenAI and Gemini batch APIs")
+    parser.add_argument(
+        "--wait-both",
+        action="store_true",
+        help="let the slower provider finish instead of cancelling it"
+    )
+    parser.add_argument(
+        "--calls-per-request",
+        type=int,
+        default=1,
+        metavar="N",
+        help="pack N transcripts into each batch request (default: 1)"
+    )
+    args = parser.parse_args()
+    if args.calls_per_request < 1:
+        parser.error("--calls-per-request must be at least 1")
+    
     # Check environment
     if not os.getenv("OPENAI_API_KEY"):
         print("❌ Error: OPENAI_API_KEY not set")
@@ -464,8 +577,10 @@ if __name__ == "__main__":
         print("   Set it with: export GOOGLE_AI_API_KEY='your-key'")
         exit(1)
     
-    print("\n📚 Both providers use async Batch APIs with 50% cost discount")
+    configure_logging(sys.stdout)  # Same stream as print() so lines stay in order
+    
+    print(f"\n📚 Both providers use async Batch APIs with {pricing.BATCH_DISCOUNT:.0%} cost discount")
     print("   OpenAI: https://platform.openai.com/docs/api-reference/batch")
     print("   Gemini: https://ai.google.dev/gemini-api/docs/batch-api")
     
-    run_race()
+    run_race(wait_both=args.wait_both, calls_per_request=args.calls_per_request)